@@ -1,49 +1,130 @@
 import json
+import logging
+import ijson
 
-# Load users and posts data from disk
-with open("data/users.json", "r") as f:
-    users = json.load(f)
-
-with open("data/posts.json", "r") as f:
-    posts = json.load(f)
-
-relationships = []
-
-# Map user IDs to validate authors exist (optional but good)
-user_ids = set(user["id"] for user in users)
-post_ids = set(post["id"] for post in posts)
-
-# 1) Create CREATED relationships: User -> Post
-for post in posts:
-    author_id = post.get("author_id")
-    post_id = post["id"]
-    if author_id in user_ids:
-        relationships.append({
-            "from": author_id,
-            "relationship": "CREATED",
-            "to": post_id
-        })
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to stdlib json
+
+logger = logging.getLogger(__name__)
+
+# Unknown ids kept per category for the summary warning
+SAMPLE_SIZE = 10
+
+
+def read_json(path):
+    """Read a JSON file, using orjson when available."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def write_json(path, data):
+    """Write data as indented JSON, using orjson when available."""
+    if orjson is not None:
+        raw = orjson.dumps(data, option=orjson.OPT_INDENT_2)
     else:
-        print(f"Warning: Post {post_id} references unknown author_id '{author_id}'")
+        raw = json.dumps(data, indent=2).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(raw)
+
+
+POSTS_JSON = "data/posts.json"
+
+
+def iter_posts():
+    """Stream post objects one at a time instead of loading the whole file."""
+    with open(POSTS_JSON, "rb") as f:
+        yield from ijson.items(f, "item")
+
+
+def build_relationships(user_ids, posts):
+    """
+    Build CREATED and SHARED relationship records in a single pass over posts.
+    Runs as a function so the hot loop works on fast local names.
+    :param user_ids: Set of known user ids
+    :param posts: Iterable of post dicts
+    """
+    relationships = []
+    append = relationships.append
+    # (from, relationship, to) keys already emitted, so repeated edges are sent once
+    seen = set()
+    mark_seen = seen.add
+    post_ids = set()
+    add_post_id = post_ids.add
+    # Dropped edges are counted rather than reported row by row
+    bad_authors = 0
+    bad_shares = 0
+    bad_author_samples = []
+    bad_share_samples = []
 
-# 2) Create SHARED relationships: Shared Post -> Original Post
-# Using the 'shared_post_id' field if present
-for post in posts:
-    shared_post_id = post.get("shared_post_id")
-    if shared_post_id:
+    # 1) Create CREATED relationships: User -> Post
+    # 2) Collect SHARED candidates (Shared Post -> Original Post) from the
+    #    'shared_post_id' field; they are validated once every post id is known
+    shared_candidates = []
+    for post in posts:
+        author_id = post.get("author_id")
+        post_id = post["id"]
+        add_post_id(post_id)
+        if author_id in user_ids:
+            key = (author_id, "CREATED", post_id)
+            if key not in seen:
+                mark_seen(key)
+                append({
+                    "from": author_id,
+                    "relationship": "CREATED",
+                    "to": post_id
+                })
+        else:
+            bad_authors += 1
+            if len(bad_author_samples) < SAMPLE_SIZE:
+                bad_author_samples.append(author_id)
+
+        shared_post_id = post.get("shared_post_id")
+        if shared_post_id:
+            shared_candidates.append((post_id, shared_post_id))
+
+    for post_id, shared_post_id in shared_candidates:
         if shared_post_id in post_ids:
-            relationships.append({
-                "from": post["id"],
-                "relationship": "SHARED",
-                "to": shared_post_id
-            })
+            key = (post_id, "SHARED", shared_post_id)
+            if key not in seen:
+                mark_seen(key)
+                append({
+                    "from": post_id,
+                    "relationship": "SHARED",
+                    "to": shared_post_id
+                })
         else:
-            print(f"Warning: Post {post['id']} shares unknown post '{shared_post_id}'")
+            bad_shares += 1
+            if len(bad_share_samples) < SAMPLE_SIZE:
+                bad_share_samples.append(shared_post_id)
+
+    if bad_authors or bad_shares:
+        logger.warning(
+            "relationships dropped: %d unknown authors (e.g. %s), %d unknown shares (e.g. %s)",
+            bad_authors, bad_author_samples, bad_shares, bad_share_samples,
+        )
+
+    # (Optional) Add more relationships here if needed
+
+    return relationships
+
+
+def main():
+    # Users are small enough to load in full; posts are streamed
+    users = read_json("data/users.json")
+
+    # Map user IDs to validate authors exist (optional but good)
+    user_ids = {user["id"] for user in users}
+
+    relationships = build_relationships(user_ids, iter_posts())
+
+    # Write the relationships to the output JSON file
+    write_json("data/relationships.json", relationships)
 
-# (Optional) Add more relationships here if needed
+    print(f"Generated relationships.json with {len(relationships)} relationships")
 
-# Write the relationships to the output JSON file
-with open("data/relationships.json", "w") as f:
-    json.dump(relationships, f, indent=2)
 
-print(f"Generated relationships.json with {len(relationships)} relationships")
+if __name__ == "__main__":
+    main()
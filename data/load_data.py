@@ -1,7 +1,75 @@
 import os
-import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+import ijson
 from neo4j import GraphDatabase, basic_auth
 
+# Rows sent per UNWIND write transaction during bulk loads
+BATCH_SIZE = 1000
+# Concurrent sessions used to commit those transactions
+MAX_WORKERS = 8
+# Chunks queued or in flight before parsing waits for a commit to finish
+MAX_PENDING = 2 * MAX_WORKERS
+
+
+def iter_json_items(path):
+    """Stream the objects of a top-level JSON array one at a time."""
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+@lru_cache(maxsize=None)
+def get_driver(uri, user, password):
+    """
+    Return the process-wide driver for these connection settings.
+    Its connection pool is sized for MAX_WORKERS concurrent sessions with headroom.
+    """
+    return GraphDatabase.driver(
+        uri,
+        auth=basic_auth(user, password),
+        max_connection_pool_size=32,
+        connection_acquisition_timeout=60,
+    )
+
+
+class BatchWriter:
+    """
+    Buffer rows for one UNWIND $batch query and hand each full BATCH_SIZE
+    chunk to the loader's worker lanes while the input is still being read.
+    """
+
+    def __init__(self, loader, query, partition_key=None):
+        """
+        :param loader: Neo4jDataLoader whose lanes commit the chunks
+        :param query: Cypher reading its rows from $batch
+        :param partition_key: Optional row key; rows sharing a value always go to the
+            same lane, so concurrent MERGEs never lock the same node
+        """
+        self.loader = loader
+        self.query = query
+        self.partition_key = partition_key
+        self.buffers = [[] for _ in range(MAX_WORKERS)]
+        self.count = 0
+
+    def add(self, row):
+        if self.partition_key is None:
+            lane = self.count // BATCH_SIZE % MAX_WORKERS
+        else:
+            lane = hash(row[self.partition_key]) % MAX_WORKERS
+        buffer = self.buffers[lane]
+        buffer.append(row)
+        self.count += 1
+        if len(buffer) >= BATCH_SIZE:
+            self.loader.submit_chunk(lane, self.query, buffer)
+            self.buffers[lane] = []
+
+    def flush(self):
+        for lane, buffer in enumerate(self.buffers):
+            if buffer:
+                self.loader.submit_chunk(lane, self.query, buffer)
+                self.buffers[lane] = []
+
 
 class Neo4jDataLoader:
     def __init__(self, uri, user, password, database=None):
@@ -16,15 +84,71 @@ class Neo4jDataLoader:
         self.user = user
         self.password = password
         self.database = database
-        self.driver = GraphDatabase.driver(uri, auth=basic_auth(user, password))
+        self.driver = get_driver(uri, user, password)
+        # One single-threaded lane per worker, each reusing one session for all of
+        # its chunks; chunks on the same lane commit in submission order
+        self._lanes = [ThreadPoolExecutor(max_workers=1) for _ in range(MAX_WORKERS)]
+        self._pending = set()
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
 
     def close(self):
+        for lane in self._lanes:
+            lane.shutdown()
+        for session in self._sessions:
+            session.close()
         self.driver.close()
+        get_driver.cache_clear()
+
+    def _session(self):
+        """Return the calling thread's session, opening it on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self.driver.session(database=self.database)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
 
     def run_cypher(self, query, parameters=None):
-        with self.driver.session(database=self.database) as session:
-            result = session.run(query, parameters or {})
-            return result.data()
+        result = self._session().run(query, parameters or {})
+        return result.data()
+
+    def run_cypher_batched(self, query, rows, partition_key=None):
+        """
+        Run an UNWIND $batch query over rows in BATCH_SIZE chunks, committing
+        each chunk in its own managed write transaction across MAX_WORKERS sessions.
+        :param query: Cypher reading its rows from $batch
+        :param rows: Iterable of row dicts, consumed lazily
+        :param partition_key: Optional row key, see BatchWriter
+        :return: Number of rows written
+        """
+        writer = BatchWriter(self, query, partition_key)
+        for row in rows:
+            writer.add(row)
+        writer.flush()
+        self.wait_for_chunks()
+        return writer.count
+
+    def submit_chunk(self, lane, query, chunk):
+        """Queue a chunk on a lane, blocking while MAX_PENDING chunks are outstanding."""
+        if len(self._pending) >= MAX_PENDING:
+            self._collect(FIRST_COMPLETED)
+        self._pending.add(self._lanes[lane].submit(self._write_chunk, query, chunk))
+
+    def wait_for_chunks(self):
+        """Block until every submitted chunk is committed, re-raising any failure."""
+        while self._pending:
+            self._collect(FIRST_COMPLETED)
+
+    def _collect(self, return_when):
+        done, self._pending = wait(self._pending, return_when=return_when)
+        for future in done:
+            future.result()
+
+    def _write_chunk(self, query, chunk):
+        self._session().execute_write(lambda tx: tx.run(query, {"batch": chunk}).consume())
 
     def create_database(self, db_name):
         """
@@ -40,44 +164,55 @@ class Neo4jDataLoader:
             print("Already connected to system database.")
 
     def create_constraints(self):
+        """
+        Create uniqueness constraints and the lookup indexes used by loads and
+        generated queries, all in a single write transaction.
+        """
         constraints = [
             "CREATE CONSTRAINT IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE",
             "CREATE CONSTRAINT IF NOT EXISTS FOR (p:Post) REQUIRE p.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (f:FactCheck) REQUIRE f.id IS UNIQUE"
+            "CREATE CONSTRAINT IF NOT EXISTS FOR (f:FactCheck) REQUIRE f.id IS UNIQUE",
+            "CREATE INDEX IF NOT EXISTS FOR (p:Post) ON (p.author_id)",
+            "CREATE INDEX IF NOT EXISTS FOR (p:Post) ON (p.timestamp)",
+            "CREATE INDEX IF NOT EXISTS FOR (p:Post) ON (p.platform)",
+            "CREATE INDEX IF NOT EXISTS FOR (u:User) ON (u.username)",
         ]
-        print("Creating uniqueness constraints...")
-        for cql in constraints:
-            self.run_cypher(cql)
+
+        def create_schema(tx):
+            for cql in constraints:
+                tx.run(cql).consume()
+
+        print("Creating uniqueness constraints and indexes...")
+        self._session().execute_write(create_schema)
         print("Constraints created or verified.")
 
     def load_json_as_nodes(self, json_path, label, property_mapping):
         """
-        Load JSON file contents and import as nodes.
-        Uses UNWIND with parameters to reduce number of queries.
+        Stream JSON file contents and import as nodes.
+        Uses UNWIND with parameters, committed in batches of BATCH_SIZE rows
+        as soon as each batch has been parsed.
         :param json_path: Path to JSON file with list of dicts
         :param label: Neo4j node label, e.g., User, Post
         :param property_mapping: Dict mapping node property names to JSON keys or transformation code
         """
         print(f"Loading nodes from {json_path} as :{label}...")
 
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # Split simple direct mappings from callables used for transformation once,
+        # so the per-entry loop does no callable() checks
+        direct = [(prop, key) for prop, key in property_mapping.items() if not callable(key)]
+        computed = [(prop, fn) for prop, fn in property_mapping.items() if callable(fn)]
 
-        # Prepare list of dicts with properties per property_mapping
-        nodes_to_create = []
-        for entry in data:
-            node_props = {}
-            for prop, json_key in property_mapping.items():
-                # Simple direct mapping or use a callable for transformation
-                if callable(json_key):
+        # Prepare dicts with properties per property_mapping
+        def nodes_to_create():
+            for entry in iter_json_items(json_path):
+                node_props = {prop: entry.get(key) for prop, key in direct}
+                for prop, fn in computed:
                     try:
-                        node_props[prop] = json_key(entry)
+                        node_props[prop] = fn(entry)
                     except Exception as e:
                         print(f"Error processing property {prop}: {e}")
                         node_props[prop] = None
-                else:
-                    node_props[prop] = entry.get(json_key)
-            nodes_to_create.append(node_props)
+                yield node_props
 
         # Cypher: UNWIND parameter list to create nodes
         props_keys = list(property_mapping.keys())
@@ -88,64 +223,77 @@ class Neo4jDataLoader:
         MERGE (n:{label} {{id: row.id}})
         SET n += {{{props_str}}}
         """
-        self.run_cypher(cypher, {"batch": nodes_to_create})
-        print(f"Imported {len(nodes_to_create)} nodes as :{label}")
+        count = self.run_cypher_batched(cypher, nodes_to_create())
+        print(f"Imported {count} nodes as :{label}")
 
     def load_relationships(self, json_path):
         """
-        Load relationships from JSON and create relations.
+        Stream relationships from JSON and create relations.
         Assumes JSON has: from, relationship, to
         """
         print(f"Loading relationships from {json_path}...")
 
-        with open(json_path, "r", encoding="utf-8") as f:
-            rels = json.load(f)
-
-        rels_to_create = []
-        valid_rel_types = {"CREATED", "VERIFIED_BY", "SHARED"}
-
-        for r in rels:
-            from_id = r.get("from")
-            to_id = r.get("to")
-            rel_type = r.get("relationship")
-
-            if rel_type not in valid_rel_types:
-                print(f"Skipping unknown relationship type: {rel_type}")
-                continue
-
-            rels_to_create.append({
-                "from_id": from_id,
-                "rel_type": rel_type,
-                "to_id": to_id,
-            })
-
-        # Create relationships by type, ensure MATCH uses id property to find nodes
-        for rel_type in valid_rel_types:
-            batch = [r for r in rels_to_create if r["rel_type"] == rel_type]
-            if not batch:
-                continue
-
-            cypher = f"""
-            UNWIND $batch AS row
-            MATCH (a {{id: row.from_id}}), (b {{id: row.to_id}})
-            MERGE (a)-[r:{rel_type}]->(b)
+        # Endpoint labels per relationship type, so MATCH can use the id constraints
+        valid_rel_types = {
+            "CREATED": ("User", "Post"),
+            "VERIFIED_BY": ("Post", "FactCheck"),
+            "SHARED": ("Post", "Post"),
+        }
+
+        # All types share one UNWIND; each unit subquery keeps only its own rows and
+        # MATCHes on labelled id lookups to hit the indexes
+        subqueries = "".join(
+            f"""
+            CALL {{
+                WITH row
+                WITH row WHERE row.rel_type = '{rel_type}'
+                MATCH (a:{from_label} {{id: row.from_id}}), (b:{to_label} {{id: row.to_id}})
+                MERGE (a)-[:{rel_type}]->(b)
+            }}"""
+            for rel_type, (from_label, to_label) in valid_rel_types.items()
+        )
+        cypher = f"""
+            UNWIND $batch AS row{subqueries}
             """
-            self.run_cypher(cypher, {"batch": batch})
 
-        print(f"Imported {len(rels_to_create)} relationships.")
+        def rels_to_create():
+            for r in iter_json_items(json_path):
+                rel_type = r.get("relationship")
+
+                if rel_type not in valid_rel_types:
+                    print(f"Skipping unknown relationship type: {rel_type}")
+                    continue
+
+                yield {
+                    "from_id": r.get("from"),
+                    "rel_type": rel_type,
+                    "to_id": r.get("to"),
+                }
 
-    def create_author_relationships(self):
+        count = self.run_cypher_batched(cypher, rels_to_create(), partition_key="from_id")
+        print(f"Imported {count} relationships.")
+
+    def create_author_relationships(self, posts_json_path):
         """
-        Create explicit CREATED relationships from Posts' author_id to Users
+        Create explicit CREATED relationships from Posts' author_id to Users.
+        Pairs are streamed from the posts JSON and matched by id in batches,
+        avoiding a User x Post cross product on the server.
+        :param posts_json_path: Path to the posts JSON file
         """
         print("Creating author-post relationships (CREATED) from author_id...")
+        authorships = (
+            {"author_id": p["author_id"], "post_id": p["id"]}
+            for p in iter_json_items(posts_json_path)
+            if p.get("author_id") is not None
+        )
+
         cypher = """
-        MATCH (u:User), (p:Post)
-        WHERE p.author_id = u.id
+        UNWIND $batch AS row
+        MATCH (u:User {id: row.author_id}), (p:Post {id: row.post_id})
         MERGE (u)-[:CREATED]->(p)
         """
-        self.run_cypher(cypher)
-        print("Author-post relationships created.")
+        count = self.run_cypher_batched(cypher, authorships, partition_key="author_id")
+        print(f"Author-post relationships created for {count} posts.")
 
 
 def main():
@@ -167,7 +315,7 @@ def main():
     # Optional: create a new database (if your Neo4j supports multi-db)
     # loader.create_database("socialmedia")
 
-    # Create uniqueness constraints
+    # Create uniqueness constraints and lookup indexes
     loader.create_constraints()
 
     # Load nodes:
@@ -215,7 +363,7 @@ def main():
     )
 
     # Create author-post relationships from author_id property before loading other relations
-    loader.create_author_relationships()
+    loader.create_author_relationships(POSTS_JSON)
 
     # Load other relationships
     loader.load_relationships(RELATIONSHIPS_JSON)
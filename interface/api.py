@@ -1,31 +1,64 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 from interface.service import QueryService
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Social Media Query API")
+# Worker threads for blocking LLaMA calls made through asyncio.to_thread; asyncio's
+# default executor has only min(32, cpu + 4), and callers joining an in-flight
+# identical prompt hold a worker while they wait
+THREADPOOL_SIZE = 128
+
+app = FastAPI(title="Social Media Query API", default_response_class=ORJSONResponse)
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREADPOOL_SIZE))
+
+
+@app.on_event("startup")
+async def warm_up_model():
+    await run_in_threadpool(QueryService.warm_up)
 
 
 class QueryRequest(BaseModel):
-    question: str
+    # Stripped before the length check, so blank questions are rejected with a 422
+    question: str = Field(..., min_length=1)
+
+    class Config:
+        anystr_strip_whitespace = True
+        extra = "forbid"
 
 
 class QueryResponse(BaseModel):
-    result: str
+    # Exactly one is set: Neo4j rows, or a message when there are no rows to show
+    rows: Optional[List[Dict[str, Any]]] = None
+    text: Optional[str] = None
 
 
 @app.post("/query", response_model=QueryResponse)
-def process_query(req: QueryRequest):
-    if not req.question.strip():
-        logger.warning("Empty question submitted.")
-        raise HTTPException(status_code=400, detail="Question must not be empty")
-
+async def process_query(req: QueryRequest):
     try:
-        result = QueryService.run_query(req.question)
+        # Neo4j calls are async and LLaMA calls run in threads, so requests overlap
+        result = await QueryService.run_query(req.question)
         logger.info("API query processed successfully.")
-        return QueryResponse(result=result)
+        if isinstance(result, list):
+            return QueryResponse(rows=result)
+        return QueryResponse(text=result)
     except Exception as e:
         logger.error(f"API error processing query: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/cache_clear")
+async def cache_clear():
+    QueryService.clear_cache()
+    logger.info("API result cache cleared.")
+    return {"status": "cleared"}
@@ -1,22 +1,54 @@
 import logging
-from langgraph_workflow.agent import run_agent_query
+from typing import List, Union
+from langgraph_workflow.agent import run_agent_query, warm_up_agent
+from langgraph_workflow.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Results of recent questions; entries expire so newly loaded Neo4j data shows up
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_TTL = 300
+
+_result_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
 
 class QueryService:
     @staticmethod
-    def run_query(user_question: str) -> str:
+    def warm_up() -> None:
+        """
+        Warm up the LLaMA model and its cached prompt prefix before serving queries.
+        """
+        warm_up_agent()
+        logger.info("QueryService: warm-up completed.")
+
+    @staticmethod
+    async def run_query(user_question: str) -> Union[List[dict], str]:
         """
         Run the multi-node LangGraph workflow for the user question.
 
         Returns:
-            str: The Neo4j query results or error message.
+            list | str: The Neo4j result rows, or an error message.
         """
+        cached = _result_cache.get(user_question)
+        if cached is not None:
+            logger.info("QueryService: run_query served from cache.")
+            return cached
         try:
-            final_state = run_agent_query(user_question)
+            final_state = await run_agent_query(user_question)
             logger.info("QueryService: run_query completed.")
-            return final_state.get("cypher_result", "No results found.")
+            result = final_state.get("cypher_result", "No results found.")
+            # Only Neo4j rows are cached; errors are retried next time
+            if isinstance(result, list):
+                _result_cache.put(user_question, result)
+            return result
         except Exception as e:
             logger.error(f"QueryService error: {e}")
             return f"Error running query: {str(e)}"
+
+    @staticmethod
+    def clear_cache() -> None:
+        """
+        Drop all cached query results.
+        """
+        _result_cache.clear()
+        logger.info("QueryService: result cache cleared.")
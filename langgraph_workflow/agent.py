@@ -1,10 +1,10 @@
 import logging
-from langgraph_workflow.stategraph import graph
+from langgraph_workflow.stategraph import graph, warm_up_prompt_cache
 
 logger = logging.getLogger(__name__)
 
 
-def run_agent_query(user_question: str):
+async def run_agent_query(user_question: str):
     """
     Run the LangGraph workflow graph with user question and return query results.
     """
@@ -12,10 +12,11 @@ def run_agent_query(user_question: str):
         "query": user_question,
         "llama_prompt": "",
         "llama_response": "",
+        "cypher_params": {},
         "cypher_result": "",
     }
     try:
-        final_state = graph.invoke(initial_state)
+        final_state = await graph.ainvoke(initial_state)
         logger.info("Graph invoked successfully.")
         return final_state
     except Exception as e:
@@ -26,3 +27,10 @@ def run_agent_query(user_question: str):
             "llama_response": "",
             "cypher_result": f"Error during graph invocation: {str(e)}",
         }
+
+
+def warm_up_agent():
+    """
+    Prepare the LLaMA model for the workflow's prompts ahead of the first question.
+    """
+    warm_up_prompt_cache()
@@ -1,9 +1,17 @@
+import asyncio
 import logging
+from typing import List, Union
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
-from langgraph_workflow.tools import call_llama, execute_cypher
-from datetime import datetime, timedelta
+from langgraph_workflow.tools import call_llama, execute_cypher, warm_up_llama
+from langgraph_workflow.cache import LRUCache
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import hashlib
+import orjson
 import re
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -11,68 +19,13 @@ class GraphState(TypedDict):
     query: str
     llama_prompt: str
     llama_response: str
-    cypher_result: str
+    cypher_params: dict  # Query parameters such as $start_of_week
+    cypher_result: Union[List[dict], str]  # Rows, or an error message
     summary_result: str  # Add this new key for summary output
 
-def build_llama_prompt_node(state: GraphState) -> dict:
-    """
-    Build prompt string for LLaMA to generate valid Cypher queries from natural language,
-    supporting natural date expressions (this week, this month, etc.) that are converted
-    to concrete ISO datetime strings, and prompt-enforced output validation.
-    """
-
-    def parse_natural_date_expression(nl_text: str) -> dict:
-        """
-        Detects natural language time expressions in the input question
-        and returns a dict of date parameters for Cypher usage.
-        Returns keys like 'start_of_week', 'start_of_month', 'start_of_year' as ISO strings.
-        """
-        res = {}
-        text = nl_text.lower()
-        today = datetime.utcnow()
-        start_of_week = today - timedelta(days=today.weekday())  # Monday
-        start_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        start_of_year = today.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        if "this week" in text:
-            res["start_of_week"] = start_of_week.isoformat()
-
-        if "last week" in text:
-            last_week_start = start_of_week - timedelta(days=7)
-            res["start_of_week"] = last_week_start.isoformat()
-
-        if "this month" in text:
-            res["start_of_month"] = start_of_month.isoformat()
-
-        if "last month" in text:
-            last_month = (start_of_month - timedelta(days=1)).replace(day=1)
-            res["start_of_month"] = last_month.isoformat()
-
-        if "this year" in text:
-            res["start_of_year"] = start_of_year.isoformat()
-
-        if "last year" in text:
-            last_year_start = start_of_year.replace(year=start_of_year.year - 1)
-            res["start_of_year"] = last_year_start.isoformat()
-
-        return res
-
-    date_params = parse_natural_date_expression(state["query"])
-
-    date_clauses = []
-    if "start_of_week" in date_params:
-        date_clauses.append(f"p.timestamp >= datetime('{date_params['start_of_week']}')")
-    if "start_of_month" in date_params:
-        date_clauses.append(f"p.timestamp >= datetime('{date_params['start_of_month']}')")
-    if "start_of_year" in date_params:
-        date_clauses.append(f"p.timestamp >= datetime('{date_params['start_of_year']}')")
-
-    if date_clauses:
-        date_filter_clause = " AND (" + " OR ".join(date_clauses) + ")"
-    else:
-        date_filter_clause = ""
-
-    template = f"""
+# Instructions, schema and examples shared verbatim by every request. Nothing
+# request-specific appears here, so Ollama can reuse its KV cache for this prefix.
+_SYSTEM_PREFIX = """
 You are a Cypher query generation assistant specialized in social media data lineage with temporal and relationship complexity.
 
 Given a user's natural language question, generate a **valid Neo4j Cypher query only** — no explanations or comments.
@@ -82,12 +35,9 @@ Given a user's natural language question, generate a **valid Neo4j Cypher query
 **Important Instructions:**
 
 - Only output the Cypher query.
-- Use explicit datetime literals in ISO 8601 format like: datetime('2023-08-10T00:00:00')
+- Never write datetime literals; use the query parameters $start_of_week, $start_of_month and $start_of_year like: datetime($start_of_week)
 - For natural language dates like 'this week', 'this month', 'this year', 'last week', 'last month', filter posts accordingly.
-- Use the following date filters in your query:
-
-{date_filter_clause if date_filter_clause else 'No date filters requested.'}
-
+- Use the date filters given with the question below.
 - Avoid any Cypher commands that modify or delete data such as DROP, DELETE, REMOVE.
 - Prioritize read-only queries (MATCH, OPTIONAL MATCH, WHERE, RETURN).
 - Return only relevant fields like p.id, p.content, p.shares, p.timestamp, user.id, etc.
@@ -99,11 +49,11 @@ Given a user's natural language question, generate a **valid Neo4j Cypher query
 
 Nodes:
 
-User: {{id (string), name (string), username (string), email (string), followers (integer), account_created (date), verified (boolean), location (string)}}
+User: {id (string), name (string), username (string), email (string), followers (integer), account_created (date), verified (boolean), location (string)}
 
-Post: {{id (string), content (string), likes (integer), shares (integer), comments (integer), platform (string), timestamp (datetime), author_id (string), tags (list of strings)}}
+Post: {id (string), content (string), likes (integer), shares (integer), comments (integer), platform (string), timestamp (datetime), author_id (string), tags (list of strings)}
 
-FactCheck: {{id (string), status (string), comments (string)}}
+FactCheck: {id (string), status (string), comments (string)}
 
 Relationships:
 
@@ -118,36 +68,164 @@ Relationships:
 Examples:
 
 Q: Show me the most viral posts on Twitter this week
-A: MATCH (p:Post) WHERE p.shares > 100 AND p.platform = 'Twitter' AND p.timestamp >= datetime('{date_params.get("start_of_week", "2023-01-01T00:00:00")}') RETURN p.id, p.content, p.shares, p.timestamp ORDER BY p.shares DESC LIMIT 5
+A: MATCH (p:Post) WHERE p.shares > 100 AND p.platform = 'Twitter' AND p.timestamp >= datetime($start_of_week) RETURN p.id, p.content, p.shares, p.timestamp ORDER BY p.shares DESC LIMIT 5
 
 Q: Find posts verified as false news this month
-A: MATCH (p:Post)-[:VERIFIED_BY]->(f:FactCheck {{status: "False"}}) WHERE p.timestamp >= datetime('{date_params.get("start_of_month", "2023-01-01T00:00:00")}') RETURN p.id, p.content, f.comments LIMIT 5
+A: MATCH (p:Post)-[:VERIFIED_BY]->(f:FactCheck {status: "False"}) WHERE p.timestamp >= datetime($start_of_month) RETURN p.id, p.content, f.comments LIMIT 5
 
 Q: Who shared the COVID variant news?
 A: MATCH (u:User)-[:SHARED]->(p:Post) WHERE toLower(p.content) CONTAINS 'covid variant' RETURN u.id, u.name, p.content, p.timestamp LIMIT 5
 
 Q: Find posts created by 'john_doe' and shared by 'emma_green' last month
-A: MATCH (u1:User {{username: 'john_doe'}})-[:CREATED]->(p:Post)<-[:SHARED]-(u2:User {{username: 'emma_green'}}) WHERE p.timestamp >= datetime('2025-07-01T00:00:00') RETURN p.id, p.content, p.timestamp LIMIT 5
+A: MATCH (u1:User {username: 'john_doe'})-[:CREATED]->(p:Post)<-[:SHARED]-(u2:User {username: 'emma_green'}) WHERE p.timestamp >= datetime($start_of_month) RETURN p.id, p.content, p.timestamp LIMIT 5
 
 Q: List posts created by user john_doe this year
-A: MATCH (u:User {{username: 'john_doe'}})-[:CREATED]->(p:Post) WHERE p.timestamp >= datetime('{date_params.get("start_of_year", "2023-01-01T00:00:00")}') RETURN p.id, p.content, p.timestamp LIMIT 5
+A: MATCH (u:User {username: 'john_doe'})-[:CREATED]->(p:Post) WHERE p.timestamp >= datetime($start_of_year) RETURN p.id, p.content, p.timestamp LIMIT 5
 
 ---
 
-Now, generate a Cypher query for the following user question.
+"""
+
+# Request-specific tail appended to _SYSTEM_PREFIX, formatted with str.format
+_QUESTION_TEMPLATE = """Now, generate a Cypher query for the following user question.
+
+Use the following date filters in your query:
+
+{date_filter_clause}
 
 Remember: Output only the Cypher query.
 
-Q: {state['query']}
+Q: {query}
 
 A:
 """
-    return {"llama_prompt": template}
 
-def call_llama_node(state: GraphState) -> dict:
+# Natural date phrases such as "this week" or "last year"
+_DATE_RE = re.compile(r"\b(this|last)\s+(week|month|year)\b")
+
+@lru_cache(maxsize=8)
+def _date_anchors(day: date) -> dict:
+    """
+    Map each (this|last, week|month|year) phrase to the ISO start of that period.
+    Cached per day, since every request on the same day shares these anchors.
+    """
+    midnight = datetime(day.year, day.month, day.day)
+    start_of_week = midnight - timedelta(days=day.weekday())  # Monday
+    start_of_month = midnight.replace(day=1)
+    start_of_year = midnight.replace(month=1, day=1)
+    return {
+        ("this", "week"): start_of_week.isoformat(),
+        ("last", "week"): (start_of_week - timedelta(days=7)).isoformat(),
+        ("this", "month"): start_of_month.isoformat(),
+        ("last", "month"): (start_of_month - timedelta(days=1)).replace(day=1).isoformat(),
+        ("this", "year"): start_of_year.isoformat(),
+        ("last", "year"): start_of_year.replace(year=start_of_year.year - 1).isoformat(),
+    }
+
+def parse_natural_date_expression(nl_text: str) -> dict:
+    """
+    Detects natural language time expressions in the input question
+    and returns a dict of date parameters for Cypher usage.
+    Returns keys like 'start_of_week', 'start_of_month', 'start_of_year' as ISO strings.
+    """
+    res = {}
+    anchors = _date_anchors(datetime.utcnow().date())
+    for match in _DATE_RE.finditer(nl_text.lower()):
+        qualifier, unit = match.groups()
+        key = f"start_of_{unit}"
+        # "last <unit>" takes precedence over "this <unit>" when both appear
+        if qualifier == "last" or key not in res:
+            res[key] = anchors[(qualifier, unit)]
+    return res
+
+def build_llama_prompt_node(state: GraphState) -> dict:
+    """
+    Build prompt string for LLaMA to generate valid Cypher queries from natural language,
+    supporting natural date expressions (this week, this month, etc.) that are passed
+    to Cypher as $start_of_* parameters, and prompt-enforced output validation.
+    """
+    date_params = parse_natural_date_expression(state["query"])
+
+    # Every date parameter is always bound, defaulting to the current period,
+    # so the query text stays constant and Neo4j can reuse its cached plan
+    anchors = _date_anchors(datetime.utcnow().date())
+    cypher_params = {
+        "question": state["query"],  # Searched for by the fallback heuristic query
+        "start_of_week": anchors[("this", "week")],
+        "start_of_month": anchors[("this", "month")],
+        "start_of_year": anchors[("this", "year")],
+    }
+    cypher_params.update(date_params)
+
+    date_clauses = [
+        f"p.timestamp >= datetime(${key})"
+        for key in ("start_of_week", "start_of_month", "start_of_year")
+        if key in date_params
+    ]
+
+    if date_clauses:
+        date_filter_clause = " AND (" + " OR ".join(date_clauses) + ")"
+    else:
+        date_filter_clause = "No date filters requested."
+
+    template = _SYSTEM_PREFIX + _QUESTION_TEMPLATE.format(
+        date_filter_clause=date_filter_clause, query=state["query"]
+    )
+    return {"llama_prompt": template, "cypher_params": cypher_params}
+
+# LLaMA responses for repeated prompts, keyed by a BLAKE2b digest of the prompt
+_llama_cache = LRUCache(maxsize=4096)
+
+# call_llama reports failures as text instead of raising; those are never cached
+_LLAMA_ERROR_PREFIXES = ("Error calling LLaMA model", "Fallback heuristic error")
+
+# Calls currently waiting on LLaMA, so concurrent identical prompts share one call
+_llama_inflight = {}
+_llama_inflight_lock = threading.Lock()
+
+def cached_call_llama(prompt: str) -> str:
+    """
+    Call LLaMA, reusing the previous response when the same prompt was seen before
+    and joining an in-flight call when the same prompt is already being generated.
+    """
+    key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+    response = _llama_cache.get(key)
+    if response is not None:
+        return response
+
+    with _llama_inflight_lock:
+        # Re-check under the lock: the previous call may have just finished
+        response = _llama_cache.get(key)
+        if response is not None:
+            return response
+        pending = _llama_inflight.get(key)
+        if pending is None:
+            _llama_inflight[key] = leader = Future()
+    if pending is not None:
+        return pending.result()
+
+    try:
+        response = call_llama(prompt)
+        if response and not response.startswith(_LLAMA_ERROR_PREFIXES):
+            _llama_cache.put(key, response)
+        leader.set_result(response)
+        return response
+    except Exception as e:
+        leader.set_exception(e)
+        raise
+    finally:
+        with _llama_inflight_lock:
+            del _llama_inflight[key]
+
+def warm_up_prompt_cache() -> None:
+    """Prime Ollama with the static prompt prefix shared by every Cypher prompt."""
+    warm_up_llama(_SYSTEM_PREFIX)
+
+async def call_llama_node(state: GraphState) -> dict:
     """Call LLaMA model to get Cypher query from prompt."""
     try:
-        query = call_llama(state["llama_prompt"])
+        # The Ollama SDK is blocking; run it off the event loop
+        query = await asyncio.to_thread(cached_call_llama, state["llama_prompt"])
         logger.debug("LLaMA node generated Cypher query.")
         print("Constructed Query = ", query)
         return {"llama_response": query}
@@ -155,14 +233,30 @@ def call_llama_node(state: GraphState) -> dict:
         logger.error(f"Error in LLaMA node: {e}")
         return {"llama_response": ""}
 
-def execute_cypher_node(state: GraphState) -> dict:
-    """Run Cypher query and fetch results with validation."""
+# Clauses that modify the graph; generated queries must be read-only
+_WRITE_CLAUSE_RE = re.compile(r"\b(DROP|DELETE|REMOVE|CREATE|MERGE|SET)\b", re.IGNORECASE)
+# String literals, backquoted names and comments, blanked out before the write-clause
+# check so text such as CONTAINS 'data set' is not mistaken for a clause
+_CYPHER_NON_CODE_RE = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/",
+    re.DOTALL,
+)
+
+async def execute_cypher_node(state: GraphState) -> dict:
+    """Run Cypher query and fetch results, rejecting queries that write to the graph."""
+    code = _CYPHER_NON_CODE_RE.sub(" ", state["llama_response"])
+    write_clause = _WRITE_CLAUSE_RE.search(code)
+    if write_clause:
+        clause = write_clause.group(1).upper()
+        logger.warning(f"Rejected Cypher query containing {clause}.")
+        return {"cypher_result": f"Error executing Cypher: {clause} is not allowed in read-only queries"}
+
     try:
-        # Validate Cypher query with EXPLAIN before executing
-        explain_query = "EXPLAIN " + state["llama_response"]
-        _ = execute_cypher(explain_query)  # Will raise if query invalid
-        # Now execute actual query
-        results = execute_cypher(state["llama_response"])
+        # Syntax errors surface from the execution itself, no separate EXPLAIN round trip
+        results = await execute_cypher.ainvoke({
+            "query": state["llama_response"],
+            "params": state.get("cypher_params", {}),
+        })
         print("results", results)
         logger.debug("Executed Cypher query successfully.")
         return {"cypher_result": results}
@@ -170,15 +264,17 @@ def execute_cypher_node(state: GraphState) -> dict:
         logger.error(f"Error executing Cypher query: {e}")
         return {"cypher_result": f"Error executing Cypher: {str(e)}"}
 
-def llama_summarize_node(state: GraphState) -> dict:
+async def llama_summarize_node(state: GraphState) -> dict:
     """
     Summarize Cypher results into human-readable text.
     """
     raw_result = state.get("cypher_result", "")
+    if isinstance(raw_result, list):
+        raw_result = orjson.dumps(raw_result).decode()
     prompt_template = f"""
 summarize {raw_result} and give it in a descriptive way.
 """
-    summary = call_llama(prompt_template)
+    summary = await asyncio.to_thread(cached_call_llama, prompt_template)
     return {"summary_result": summary}
 
 builder = StateGraph(GraphState)
@@ -1,45 +1,126 @@
 import os
 import logging
+from typing import List, Optional, Union
 from langchain_core.tools import tool
-from pydantic import BaseModel, Field
-from neo4j import GraphDatabase, exceptions as neo4j_exceptions
+from neo4j import AsyncGraphDatabase, RoutingControl, exceptions as neo4j_exceptions
 import re
-
-try:
-    import ollama
-except ImportError:
-    ollama = None  # Ollama SDK not installed
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "tempInstance")
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+
+OLLAMA_MODEL = "llama3.2"  # Adjust as needed
+# Keep the model, and the KV cache of the shared prompt prefix, loaded between requests
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Keywords a Cypher query can start with, located with str.find on the uppercased text;
+# WITH only counts when followed by whitespace, so words such as "within" do not match
+_CYPHER_KEYWORDS = ("OPTIONAL MATCH", "MATCH", "MERGE", "CREATE", "UNWIND", "WITH")
+# Same search for text whose length changes when uppercased; OPTIONAL MATCH first so MATCH does not shadow it
+_CYPHER_KEYWORD_RE = re.compile(r"(OPTIONAL MATCH|MATCH|WITH\s|CREATE|MERGE|UNWIND)", re.IGNORECASE)
+# First words of a response that is already a bare query, checked before the regex
+_CYPHER_STARTS = frozenset(["MATCH", "OPTIONAL", "WITH", "CREATE", "MERGE", "UNWIND"])
+
+# Canned queries for the heuristic used when the Ollama SDK is unavailable
+_VIRAL_Q = (
+    "MATCH (p:Post) WHERE p.shares > 100 RETURN p.id, p.content, p.shares "
+    "ORDER BY p.shares DESC LIMIT 5"
+)
+_FAKE_NEWS_Q = (
+    "MATCH (p:Post)-[:VERIFIED_BY]->(f:FactCheck {status:'False'}) "
+    "RETURN p.id, p.content, f.comments LIMIT 5"
+)
+_SHARED_Q = (
+    "MATCH (p:Post)-[:SHARED]->(original:Post) "
+    "RETURN p.id, p.content, original.id as shared_post_id LIMIT 5"
+)
+# Constant text with the question bound as $question, so one cached plan serves every prompt
+_DEFAULT_FALLBACK_QUERY = (
+    "MATCH (p:Post) WHERE toLower(p.content) CONTAINS toLower($question) "
+    "RETURN p.id, p.content, p.timestamp LIMIT 5"
+)
+# Checked in order against the lowercased question, most specific first;
+# "share" also covers "shared"
+_FALLBACK_RULES = (
+    ("fake news", _FAKE_NEWS_Q),
+    ("viral", _VIRAL_Q),
+    ("share", _SHARED_Q),
+)
+
+# The Ollama SDK and the Neo4j driver are set up on first use, not at import,
+# so importing the workflow stays cheap for callers that never query
+
+@lru_cache(maxsize=1)
+def _ollama():
+    try:
+        import ollama
+    except ImportError:
+        return None  # Ollama SDK not installed
+    return ollama
+
+@lru_cache(maxsize=1)
+def _driver():
+    # Async driver: requests waiting on Neo4j do not hold a worker thread
+    try:
+        driver = AsyncGraphDatabase.driver(
+            NEO4J_URI,
+            auth=(NEO4J_USER, NEO4J_PASSWORD),
+            # Bound the pool so bursts of API requests queue briefly instead of piling up
+            max_connection_pool_size=50,
+            connection_acquisition_timeout=30,
+        )
+        logger.info("Connected to Neo4j database.")
+        return driver
+    except neo4j_exceptions.ServiceUnavailable as e:
+        logger.error(f"Failed to connect to Neo4j: {e}")
+        return None  # Handle connection failure gracefully
 
-try:
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    logger.info("Connected to Neo4j database.")
-except neo4j_exceptions.ServiceUnavailable as e:
-    logger.error(f"Failed to connect to Neo4j: {e}")
-    driver = None  # Handle connection failure gracefully
+def _json_safe(value):
+    """
+    Convert a record value into plain JSON types: Neo4j temporal values become ISO-8601
+    strings, anything else unknown falls back to str().
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    iso_format = getattr(value, "iso_format", None)
+    return iso_format() if iso_format is not None else str(value)
+
+async def _records_to_rows(result) -> List[dict]:
+    """Convert records to JSON-safe dicts as they stream in from Neo4j."""
+    return [_json_safe(record.data()) async for record in result]
 
 @tool
-def execute_cypher(query: str) -> str:
+async def execute_cypher(query: str, params: Optional[dict] = None) -> Union[List[dict], str]:
     """
-    Execute Cypher query on Neo4j and return results as string.
-    Returns error message if execution fails.
+    Execute Cypher query on Neo4j with optional query parameters and return the rows
+    as a list of JSON-safe dicts. Returns error message if execution fails.
     """
+    driver = _driver()
     if driver is None:
         error_msg = "Neo4j driver not initialized."
         logger.error(error_msg)
         return error_msg
 
     try:
-        with driver.session() as session:
-            result = session.run(query)
-            records = [record.data() for record in result]
-            logger.debug(f"Cypher query executed: {query}")
-            return str(records)
+        # Pooled, retried read transaction in one call, no session set-up per query;
+        # rows are converted while streaming, without an eager copy of the records
+        rows = await driver.execute_query(
+            query,
+            params or {},
+            database_=NEO4J_DATABASE,
+            routing_=RoutingControl.READ,
+            result_transformer_=_records_to_rows,
+        )
+        logger.debug(f"Cypher query executed: {query}")
+        return rows
     except neo4j_exceptions.Neo4jError as e:
         logger.error(f"Cypher query failed: {e}")
         return f"Cypher query error: {str(e)}"
@@ -47,17 +128,36 @@ def execute_cypher(query: str) -> str:
         logger.error(f"Unexpected error during Cypher query execution: {e}")
         return f"Unexpected error: {str(e)}"
 
+# Pure str -> str, so identical LLaMA outputs skip the keyword search entirely
+@lru_cache(maxsize=256)
 def extract_cypher_query(text: str) -> str:
     """
     Extracts the Cypher query from the LLaMA output text, assuming it starts with a Cypher keyword like MATCH.
     """
-    keywords = ["MATCH", "WITH", "CREATE", "MERGE", "OPTIONAL MATCH", "UNWIND"]
-    pattern = re.compile(r"(" + "|".join(keywords) + ")", re.IGNORECASE)
-    match = pattern.search(text)
-    if match:
-        return text[match.start():].strip()
+    stripped = text.strip()
+    # Usual case: the model answered with the query alone
+    head = stripped[:16].upper().split(None, 1)
+    if head and head[0] in _CYPHER_STARTS:
+        return stripped
+    upper = text.upper()
+    if len(upper) == len(text):
+        start = -1
+        for keyword in _CYPHER_KEYWORDS:
+            index = upper.find(keyword)
+            if keyword == "WITH":
+                while index != -1 and not upper[index + 4:index + 5].isspace():
+                    index = upper.find(keyword, index + 4)
+            if index != -1 and (start == -1 or index < start):
+                start = index
     else:
-        return text.strip()
+        # Uppercasing expanded a character (e.g. "ß" -> "SS"), so offsets would not line up
+        match = _CYPHER_KEYWORD_RE.search(text)
+        start = match.start() if match else -1
+    if start != -1:
+        # The slice starts on a keyword, so only the tail can carry whitespace
+        return text[start:].rstrip()
+    else:
+        return stripped
 
 @tool
 def call_llama(prompt: str) -> str:
@@ -65,10 +165,10 @@ def call_llama(prompt: str) -> str:
     Call LLaMA model via Ollama SDK to generate Cypher query.
     Falls back to heuristic if SDK unavailable or on error.
     """
+    ollama = _ollama()
     if ollama is not None:
-        model_name = "llama3.2"  # Adjust as needed
         try:
-            response = ollama.generate(model=model_name, prompt=prompt)
+            response = ollama.generate(model=OLLAMA_MODEL, prompt=prompt, keep_alive=OLLAMA_KEEP_ALIVE)
             output_text = response.get("response", "").strip()
             cypher_query = extract_cypher_query(output_text)
             logger.debug("LLaMA model response received.")
@@ -78,29 +178,33 @@ def call_llama(prompt: str) -> str:
             return f"Error calling LLaMA model: {str(e)}"
     else:
         logger.warning("Ollama SDK not installed, using fallback heuristic.")
-        prompt_lower = prompt.lower()
+        # Only the question after the last "Q: " counts; the shared prompt prefix
+        # itself mentions "viral" and "shared" and would always match
+        question_lower = prompt.rpartition("\nQ: ")[2].lower()
         try:
-            if "viral" in prompt_lower:
-                return (
-                    "MATCH (p:Post) WHERE p.shares > 100 RETURN p.id, p.content, p.shares "
-                    "ORDER BY p.shares DESC LIMIT 5"
-                )
-            elif "fake news" in prompt_lower:
-                return (
-                    "MATCH (p:Post)-[:VERIFIED_BY]->(f:FactCheck {status:'False'}) "
-                    "RETURN p.id, p.content, f.comments LIMIT 5"
-                )
-            elif "shared" in prompt_lower or "share" in prompt_lower:
-                return (
-                    "MATCH (p:Post)-[:SHARED]->(original:Post) "
-                    "RETURN p.id, p.content, original.id as shared_post_id LIMIT 5"
-                )
-            else:
-                safe_prompt = prompt.replace("'", "\\'")
-                return (
-                    f"MATCH (p:Post) WHERE toLower(p.content) CONTAINS toLower('{safe_prompt}') "
-                    "RETURN p.id, p.content, p.timestamp LIMIT 5"
-                )
+            for needle, fallback_query in _FALLBACK_RULES:
+                if needle in question_lower:
+                    return fallback_query
+            return _DEFAULT_FALLBACK_QUERY
         except Exception as e:
             logger.error(f"Fallback heuristic error: {e}")
             return f"Fallback heuristic error: {str(e)}"
+
+def warm_up_llama(prefix: str) -> None:
+    """
+    Send a one-token generation for a shared prompt prefix so Ollama loads the model
+    and caches the prefix before the first real request. Failures are only logged.
+    """
+    ollama = _ollama()
+    if ollama is None:
+        return
+    try:
+        ollama.generate(
+            model=OLLAMA_MODEL,
+            prompt=prefix,
+            options={"num_predict": 1},
+            keep_alive=OLLAMA_KEEP_ALIVE,
+        )
+        logger.info("LLaMA prompt prefix warmed up.")
+    except Exception as e:
+        logger.warning(f"LLaMA warm-up failed: {e}")
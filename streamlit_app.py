@@ -1,18 +1,28 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import re
 import logging
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
 API_URL = "http://localhost:8000/query"  # Adjust to your API URL
+API_TIMEOUT = 30  # seconds
+HISTORY_SIZE = 10  # Questions kept in the sidebar
+PREVIEW_CHARS = 300  # Answer characters shown per history entry
+_URL_RE = re.compile(r"https?://\S+")
+
+
+def _md_link(match):
+    url = match.group(0)
+    return f"[{url}]({url})"
 
 
 def make_links_clickable(text):
     """Convert URLs in the text into markdown clickable links."""
-    url_pattern = r"https?://[^\s]+"
-    return re.sub(url_pattern, lambda m: f"[{m.group(0)}]({m.group(0)})", text)
+    return _URL_RE.sub(_md_link, text)
 
 
 st.title("Social Media Viral/Fake News Data Lineage Explorer")
@@ -31,7 +41,15 @@ Examples:
 query = st.text_input("Enter your question:")
 
 if "history" not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = deque(maxlen=HISTORY_SIZE)
+
+# One keep-alive HTTP session per browser session, reused across reruns
+if "http" not in st.session_state:
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    st.session_state.http = http
 
 if st.button("Ask"):
     if not query.strip():
@@ -39,23 +57,22 @@ if st.button("Ask"):
     else:
         with st.spinner("Fetching results..."):
             try:
-                response = requests.post(API_URL, json={"question": query})
+                response = st.session_state.http.post(API_URL, json={"question": query}, timeout=API_TIMEOUT)
                 response.raise_for_status()
                 data = response.json()
-                answer = data.get("result", "")
-
-                st.session_state.history.append((query, answer))
-
-                try:
-                    parsed_answer = json.loads(answer)
-                    if isinstance(parsed_answer, list) and parsed_answer:
-                        if all(isinstance(item, dict) for item in parsed_answer):
-                            st.table(parsed_answer)
-                        else:
-                            st.json(parsed_answer)
-                    else:
-                        st.markdown(make_links_clickable(answer))
-                except json.JSONDecodeError:
+                # The API returns either result rows or a text message
+                rows = data.get("rows")
+                answer = json.dumps(rows) if rows is not None else data.get("text") or ""
+
+                # Truncate once here rather than on every sidebar rerender
+                preview = answer[:PREVIEW_CHARS] + "…" if len(answer) > PREVIEW_CHARS else answer
+                st.session_state.history.append((query, preview))
+
+                if rows:
+                    st.table(rows)
+                elif rows is not None:
+                    st.markdown("No results found.")
+                else:
                     st.markdown(make_links_clickable(answer))
 
                 logger.info(f"Question processed: {query}")
@@ -65,11 +82,8 @@ if st.button("Ask"):
 
 if st.session_state.history:
     st.sidebar.header("Query History")
-    for q, a in reversed(st.session_state.history[-10:]):
+    for q, preview in reversed(st.session_state.history):
         st.sidebar.markdown(f"**Q:** {q}")
         st.sidebar.markdown(f"**A:**")
-        if len(a) > 300:
-            st.sidebar.markdown(a[:300] + "…")
-        else:
-            st.sidebar.markdown(a)
+        st.sidebar.markdown(preview)
         st.sidebar.markdown("---")